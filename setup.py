@@ -23,18 +23,15 @@ requirements = [
 
 #: Python 2 requirements
 requirements_py2 = [
-    "ipaddress",
+    "backports.functools_lru_cache",
+    "futures",
     "monotonic",
-    "tornado>=5.0.0,<=5.1.1",
-    "pyzmq>=17,<20.0.0",
     "Click>=6.0,<8.0",
     "netaddr<=0.7.19",  # Dependencies zipp and importlib-resources no longer supports Python 2.7
 ]
 
 #: Python 3 requirements
 requirements_py3 = [
-    "tornado>=5.0.0",
-    "pyzmq>=17",
     "Click>=6.0",
     "netaddr",
 ]
@@ -68,6 +65,7 @@ setup(
     tests_require=tests_requirements,
     extras_require={
         "tests": tests_requirements,
+        "fast": ['orjson; python_version >= "3.7"'],
     },  # noqa: E231
     python_requires=">=2.7,!=3.0.*,!=3.1.*,!=3.2,!=3.3,!=3.4,!=3.5,!=3.6",
     license="MIT license",
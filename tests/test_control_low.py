@@ -24,13 +24,10 @@ with warnings.catch_warnings():
 
 def make_solid_movie(num, nbytes, r, g, b):
     if nbytes == 4:
-        pat = [struct.pack(">BBBB", 0, r, g, b)] * num
+        led = struct.pack(">BBBB", 0, r, g, b)
     else:
-        pat = [struct.pack(">BBB", r, g, b)] * num
-    movie = io.BytesIO()
-    movie.write(b"".join(pat))
-    movie.seek(0)
-    return movie
+        led = struct.pack(">BBB", r, g, b)
+    return io.BytesIO(led * num)
 
 
 class TestControlInterface(unittest.TestCase):
@@ -22,11 +22,7 @@ with warnings.catch_warnings():
 
 
 def make_solid_movie(num, r, g, b):
-    pat = [struct.pack(">BBB", r, g, b)] * num
-    movie = io.BytesIO()
-    movie.write(b"".join(pat))
-    movie.seek(0)
-    return movie
+    return io.BytesIO(struct.pack(">BBB", r, g, b) * num)
 
 
 class FakeUDPclient:
@@ -35,15 +31,22 @@ class FakeUDPclient:
     """
 
     def __init__(self):
-        self.data = False
+        self.packets = []
 
     def send(self, data):
-        self.data = data
+        # Copy as the caller may reuse the buffer for the next packet
+        self.packets.append(bytes(data))
+
+    def retrieve_packets(self):
+        packets = self.packets
+        self.packets = []
+        return packets
 
     def retrieve_data(self):
-        data = self.data
-        self.data = False
-        return data
+        packets = self.retrieve_packets()
+        if not packets:
+            return False
+        return packets[-1]
 
 
 class TestControlInterfaceRealtime(unittest.TestCase):
@@ -96,3 +99,15 @@ class TestControlInterfaceRealtime(unittest.TestCase):
             self.fakeclient.retrieve_data(),
             b'\x030"\x06\x04]j&X\x00\x00\x00' + b"\xe6U\x00" * self.numleds,
         )
+
+        # Version 3 socket realtime protocol split into multiple fragments
+        ctr.set_rt_frame_socket(make_solid_movie(1000, 230, 85, 0), 3)
+        self.assertEqual(
+            self.fakeclient.retrieve_packets(),
+            [
+                b'\x030"\x06\x04]j&X\x00\x00\x00' + b"\xe6U\x00" * 300,
+                b'\x030"\x06\x04]j&X\x00\x00\x01' + b"\xe6U\x00" * 300,
+                b'\x030"\x06\x04]j&X\x00\x00\x02' + b"\xe6U\x00" * 300,
+                b'\x030"\x06\x04]j&X\x00\x00\x03' + b"\xe6U\x00" * 100,
+            ],
+        )
@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+
+import unittest
+
+from xled.device import Device
+
+
+class FakeControlInterface(object):
+    """
+    Fake control interface to replace HighControlInterface, to return
+    prepared responses.
+    """
+
+    host = "192.168.1.171"
+
+    def __init__(self):
+        self.calls = []
+
+    def get_device_info(self):
+        self.calls.append("get_device_info")
+        return {
+            "product_name": "Twinkly",
+            "hw_id": "0033aaff",
+            "mac": "5c:cf:7f:33:aa:ff",
+            "number_of_led": 250,
+            "code": 1000,
+        }
+
+    def get_network_status(self):
+        self.calls.append("get_network_status")
+        return {"mode": 1, "station": {"ssid": "home"}, "code": 1000}
+
+
+class TestDevice(unittest.TestCase):
+    """Tests for `xled.device` module."""
+
+    def setUp(self):
+        self.control = FakeControlInterface()
+        self.device = Device(self.control)
+
+    def test_device_info_filtered(self):
+        assert self.device.device_info == {
+            "product_name": "Twinkly",
+            "hw_id": "0033aaff",
+            "mac": "5c:cf:7f:33:aa:ff",
+            "number_of_led": 250,
+        }
+
+    def test_device_info_copy(self):
+        self.device.device_info.pop("mac")
+        assert self.device["mac"] == "5c:cf:7f:33:aa:ff"
+        assert "mac" in self.device.device_info
+
+    def test_network_status_copy(self):
+        self.device.network_status.clear()
+        assert self.device.network_status == {"mode": 1, "station": {"ssid": "home"}}
+
+    def test_fetched_once(self):
+        self.device["mac"]
+        self.device["number_of_led"]
+        self.device.device_info
+        assert self.control.calls == ["get_device_info"]
+
+    def test_device_id(self):
+        assert self.device["device_id"] == "Twinkly_33AAFF"
+
+    def test_network_mode(self):
+        assert self.device["network_mode"] == "station"
+
+    def test_unknown_key(self):
+        with self.assertRaises(KeyError) as context:
+            self.device["x"]
+        assert context.exception.args == ("x",)
+        assert getattr(context.exception, "__context__", None) is None
+        assert "x" not in self.device
+        assert "mac" in self.device
+        assert self.control.calls == ["get_device_info"]
@@ -1,9 +1,12 @@
 from __future__ import absolute_import
 
+import os
+import tempfile
+import threading
 import unittest
 
 from xled import discover
-from xled.compat import is_py3
+from xled.compat import is_py3, queue
 
 
 class TestDiscovery(unittest.TestCase):
@@ -47,3 +50,357 @@ class TestDiscoveryString(unittest.TestCase):
             data = "\xab\x01\xa8\xc0OKTwinkly_A1234B\x01"
         with self.assertRaises(ValueError):
             discover.decode_discovery_response(data)
+
+    def test_valid_discovery_response_bytes(self):
+        data = b"\x0a\x00\x00\x7fOKTwinkly_A1234B\x00"
+        ip_address, device_id = discover.decode_discovery_response(data)
+        assert ip_address == b"127.0.0.10"
+        assert device_id == b"Twinkly_A1234B"
+
+
+ARP_TABLE = """\
+IP address       HW type     Flags       HW address            Mask     Device
+192.168.1.1      0x1         0x2         00:11:22:33:44:55     *        wlan0
+192.168.1.171    0x1         0x2         5C:CF:7F:33:AA:FF     *        wlan0
+192.168.1.172    0x1         0x0         00:00:00:00:00:00     *        wlan0
+"""
+
+
+class TestArpLookup(unittest.TestCase):
+    """Tests for arp_lookup() from `xled.discovery` module."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "w") as arp_table:
+            arp_table.write(ARP_TABLE)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_found(self):
+        hw_address = discover.arp_lookup(b"192.168.1.171", path=self.path)
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+
+    def test_incomplete(self):
+        assert discover.arp_lookup(b"192.168.1.172", path=self.path) is None
+
+    def test_not_found(self):
+        assert discover.arp_lookup(b"192.168.1.17", path=self.path) is None
+
+    def test_missing_table(self):
+        path = self.path + ".missing"
+        assert discover.arp_lookup(b"192.168.1.171", path=path) is None
+
+
+class TestNormalizeMacAddress(unittest.TestCase):
+    """Tests for normalize_mac_address() from `xled.discovery` module."""
+
+    def test_colons(self):
+        hw_address = discover.normalize_mac_address(b"5C:CF:7F:33:AA:FF")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+
+    def test_dashes(self):
+        hw_address = discover.normalize_mac_address(b"5c-cf-7f-33-aa-ff")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+
+    def test_plain(self):
+        hw_address = discover.normalize_mac_address(b"5ccf7f33aaff")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+
+    def test_mixed_separators(self):
+        assert discover.normalize_mac_address(b"5ccf7f33:aaff") is None
+        assert discover.normalize_mac_address(b"5c-cf-7f:33:aa:ff") is None
+
+    def test_too_short(self):
+        assert discover.normalize_mac_address(b"5c:cf:7f:33:aa") is None
+
+
+class FakeResponse(object):
+    """Response returned by :class:`FakeSession`"""
+
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+class FakeSession(object):
+    """
+    Fake HTTP session to replace requests.Session of the agent, to record
+    requested URLs.
+    """
+
+    def __init__(self, content, status_code=200):
+        self.response = FakeResponse(content, status_code)
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return self.response
+
+    def close(self):
+        pass
+
+
+class AgentTestCase(unittest.TestCase):
+    """Creates InterfaceAgent without starting its loop."""
+
+    def setUp(self):
+        self.pipe = queue.Queue()
+        self.agent = discover.InterfaceAgent(self.pipe, destination_host="127.0.0.1")
+
+    def tearDown(self):
+        self.agent._executor.shutdown()
+        self.agent._http.close()
+        self.agent.udp.close()
+
+    def messages(self):
+        self.agent._flush_outbox()
+        messages = []
+        while not self.pipe.empty():
+            messages.extend(self.pipe.get_nowait())
+        return messages
+
+
+class TestGetMacAddress(AgentTestCase):
+    """Tests for InterfaceAgent.get_mac_address() from `xled.discovery` module."""
+
+    def setUp(self):
+        super(TestGetMacAddress, self).setUp()
+        self.agent._http.close()
+        self.agent._http = FakeSession(b'{"mac":"5C:CF:7F:33:AA:FF","code":1000}')
+        self.arp_lookup = discover.arp_lookup
+
+    def tearDown(self):
+        discover.arp_lookup = self.arp_lookup
+        super(TestGetMacAddress, self).tearDown()
+
+    def expire_cache(self, ip_address):
+        hw_address, device_id, _expires_at = self.agent._mac_cache[ip_address]
+        self.agent._mac_cache[ip_address] = (hw_address, device_id, 0.0)
+
+    def test_gestalt_normalized(self):
+        hw_address = self.agent.get_mac_address(b"192.0.2.1")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+        assert self.agent._http.urls == ["http://192.0.2.1/xled/v1/gestalt"]
+
+    def test_cached(self):
+        self.agent.get_mac_address(b"192.0.2.1")
+        hw_address = self.agent.get_mac_address(b"192.0.2.1")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+        assert len(self.agent._http.urls) == 1
+
+    def test_ip_address_reused(self):
+        self.agent.get_mac_address(b"192.0.2.1", b"Twinkly_AAAAAA")
+        self.agent._http.response.content = b'{"mac":"5c:cf:7f:33:bb:00"}'
+        hw_address = self.agent.get_mac_address(b"192.0.2.1", b"Twinkly_BBBBBB")
+        assert hw_address == b"5c:cf:7f:33:bb:00"
+        assert len(self.agent._http.urls) == 2
+        hw_address = self.agent.get_mac_address(b"192.0.2.1", b"Twinkly_BBBBBB")
+        assert hw_address == b"5c:cf:7f:33:bb:00"
+        assert len(self.agent._http.urls) == 2
+
+    def test_arp_not_trusted_alone(self):
+        discover.arp_lookup = lambda ip_address: b"00:11:22:33:44:55"
+        hw_address = self.agent.get_mac_address(b"192.0.2.1")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+        assert len(self.agent._http.urls) == 1
+
+    def test_expired_confirmed_by_arp(self):
+        self.agent.get_mac_address(b"192.0.2.1")
+        self.expire_cache(b"192.0.2.1")
+        discover.arp_lookup = lambda ip_address: b"5c:cf:7f:33:aa:ff"
+        hw_address = self.agent.get_mac_address(b"192.0.2.1")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+        assert len(self.agent._http.urls) == 1
+
+    def test_expired_arp_differs(self):
+        self.agent.get_mac_address(b"192.0.2.1")
+        self.expire_cache(b"192.0.2.1")
+        discover.arp_lookup = lambda ip_address: b"00:11:22:33:44:55"
+        hw_address = self.agent.get_mac_address(b"192.0.2.1")
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+        assert len(self.agent._http.urls) == 2
+
+
+class BlockingSession(FakeSession):
+    """Fake HTTP session which doesn't respond until released."""
+
+    def __init__(self, content, status_code=200):
+        super(BlockingSession, self).__init__(content, status_code)
+        self.released = threading.Event()
+
+    def get(self, url, timeout=None):
+        self.released.wait(5)
+        return super(BlockingSession, self).get(url, timeout=timeout)
+
+
+class TestProcessBeacon(AgentTestCase):
+    """Tests for InterfaceAgent.process_beacon() from `xled.discovery` module."""
+
+    BEACON = b"\x01\x02\x00\xc0OKTwinkly_A1234B\x00"
+
+    def setUp(self):
+        super(TestProcessBeacon, self).setUp()
+        self.agent._http.close()
+        self.agent._http = BlockingSession(b'{"mac":"5c:cf:7f:33:aa:ff"}')
+
+    def test_single_fetch_in_flight(self):
+        self.agent.process_beacon(self.BEACON, "192.0.2.1")
+        self.agent.process_beacon(self.BEACON, "192.0.2.1")
+        assert self.agent._pending == set([b"192.0.2.1"])
+        self.agent._http.released.set()
+        self.agent._executor.shutdown(wait=True)
+        assert len(self.agent._http.urls) == 1
+        assert not self.agent._pending
+        self.agent.process_resolved_peers()
+        assert self.messages() == [
+            (b"JOINED", b"5c:cf:7f:33:aa:ff", b"Twinkly_A1234B", b"192.0.2.1")
+        ]
+
+
+class TestReapPeers(AgentTestCase):
+    """Tests for InterfaceAgent.reap_peers() from `xled.discovery` module."""
+
+    HW_ADDRESS = b"5c:cf:7f:33:aa:ff"
+    DEVICE_ID = b"Twinkly_A1234B"
+    IP_ADDRESS = b"192.0.2.1"
+
+    def join(self, now, ip_address=IP_ADDRESS):
+        self.agent.process_peer(self.HW_ADDRESS, self.DEVICE_ID, ip_address, now)
+
+    def test_reap_on_expiry(self):
+        self.agent._cache_mac_address(self.IP_ADDRESS, self.HW_ADDRESS, self.DEVICE_ID)
+        self.join(100.0)
+        self.agent.reap_peers(100.0 + discover.PEER_EXPIRY - 0.1)
+        assert self.HW_ADDRESS in self.agent.peers
+        self.agent.reap_peers(100.0 + discover.PEER_EXPIRY + 0.1)
+        assert self.HW_ADDRESS not in self.agent.peers
+        assert self.IP_ADDRESS not in self.agent._ip_to_hw
+        assert self.IP_ADDRESS not in self.agent._mac_cache
+        assert self.messages() == [
+            (b"JOINED", self.HW_ADDRESS, self.DEVICE_ID, self.IP_ADDRESS),
+            (b"LEFT", self.HW_ADDRESS),
+        ]
+
+    def test_no_reap_after_refresh(self):
+        self.join(100.0)
+        self.join(103.0)
+        self.agent.reap_peers(100.0 + discover.PEER_EXPIRY + 0.1)
+        assert self.HW_ADDRESS in self.agent.peers
+        # Stale heap entry of the first beacon is dropped
+        assert len(self.agent._expiry_heap) == 1
+        self.agent.reap_peers(103.0 + discover.PEER_EXPIRY + 0.1)
+        assert self.HW_ADDRESS not in self.agent.peers
+        assert not self.agent._expiry_heap
+        assert [msg[0] for msg in self.messages()] == [b"JOINED", b"ALIVE", b"LEFT"]
+
+    def test_rejoin(self):
+        self.join(100.0)
+        self.join(102.0)
+        self.agent.reap_peers(102.0 + discover.PEER_EXPIRY + 0.1)
+        self.join(110.0)
+        # Peer is tracked again after it left
+        self.agent.reap_peers(110.0 + discover.PEER_EXPIRY - 0.1)
+        assert self.HW_ADDRESS in self.agent.peers
+        assert self.agent._ip_to_hw[self.IP_ADDRESS] == self.HW_ADDRESS
+        assert [msg[0] for msg in self.messages()] == [
+            b"JOINED",
+            b"ALIVE",
+            b"LEFT",
+            b"JOINED",
+        ]
+
+    def test_address_changed(self):
+        self.join(100.0)
+        self.join(101.0, ip_address=b"192.0.2.2")
+        assert self.IP_ADDRESS not in self.agent._ip_to_hw
+        assert self.agent._ip_to_hw[b"192.0.2.2"] == self.HW_ADDRESS
+        self.agent.reap_peers(101.0 + discover.PEER_EXPIRY + 0.1)
+        assert not self.agent._ip_to_hw
+        assert [msg[0] for msg in self.messages()] == [
+            b"JOINED",
+            b"ADDRESS_CHANGED",
+            b"ALIVE",
+            b"LEFT",
+        ]
+
+
+class TestMacAddressCache(AgentTestCase):
+    """Tests for MAC address cache of InterfaceAgent from `xled.discovery` module."""
+
+    def ip_address(self, index):
+        return "192.0.{0}.{1}".format(index // 256, index % 256).encode("ascii")
+
+    def test_expiry(self):
+        self.agent._cache_mac_address(
+            b"192.0.2.1", b"5c:cf:7f:33:aa:ff", b"Twinkly_A1234B"
+        )
+        hw_address, device_id, expires_at = self.agent._mac_cache[b"192.0.2.1"]
+        assert hw_address == b"5c:cf:7f:33:aa:ff"
+        assert device_id == b"Twinkly_A1234B"
+        assert expires_at > discover.monotonic() + discover.MAC_ADDRESS_CACHE_TTL - 1
+
+    def test_evict_oldest(self):
+        for index in range(discover.MAC_ADDRESS_CACHE_SIZE):
+            self.agent._cache_mac_address(self.ip_address(index), b"00:00:00:00:00:00")
+        assert len(self.agent._mac_cache) == discover.MAC_ADDRESS_CACHE_SIZE
+        # Refreshed entry becomes the newest one
+        self.agent._cache_mac_address(self.ip_address(0), b"00:00:00:00:00:00")
+        self.agent._cache_mac_address(b"198.51.100.1", b"5c:cf:7f:33:aa:ff")
+        assert len(self.agent._mac_cache) == discover.MAC_ADDRESS_CACHE_SIZE
+        assert self.ip_address(0) in self.agent._mac_cache
+        assert self.ip_address(1) not in self.agent._mac_cache
+        assert b"198.51.100.1" in self.agent._mac_cache
+
+    def test_forget(self):
+        self.agent._cache_mac_address(b"192.0.2.1", b"5c:cf:7f:33:aa:ff")
+        self.agent._forget_mac_address(b"192.0.2.1")
+        self.agent._forget_mac_address(b"192.0.2.2")
+        assert not self.agent._mac_cache
+
+
+class TestDiscoveryInterfaceRecv(unittest.TestCase):
+    """Tests for DiscoveryInterface.recv() from `xled.discovery` module."""
+
+    def setUp(self):
+        self.interface = discover.DiscoveryInterface("127.0.0.1", receive_timeout=0.01)
+
+    def tearDown(self):
+        self.interface.stop()
+
+    def test_split_batch(self):
+        self.interface.pipe.put(
+            [
+                (b"JOINED", b"5c:cf:7f:33:aa:ff", b"Twinkly_A1234B", b"192.0.2.1"),
+                (b"LEFT", b"5c:cf:7f:33:aa:ff"),
+            ]
+        )
+        self.interface.pipe.put([(b"ALIVE", b"00:11:22:33:44:55")])
+        assert self.interface.recv() == [
+            b"JOINED",
+            b"5c:cf:7f:33:aa:ff",
+            b"Twinkly_A1234B",
+            b"192.0.2.1",
+        ]
+        assert self.interface.recv() == [b"LEFT", b"5c:cf:7f:33:aa:ff"]
+        assert self.interface.recv() == [b"ALIVE", b"00:11:22:33:44:55"]
+
+    def test_receive_timeout(self):
+        assert self.interface.recv() == [b"RECEIVE_TIMEOUT"]
+
+
+class TestAgentLoop(AgentTestCase):
+    """Tests for InterfaceAgent.start() from `xled.discovery` module."""
+
+    def test_stopped(self):
+        self.agent.stop()
+        self.agent.start()
+        assert self.messages() == []
+
+    def test_error(self):
+        def failing_loop(selector):
+            raise ValueError("filedescriptor out of range in select()")
+
+        self.agent._loop = failing_loop
+        self.agent.start()
+        assert self.messages() == [(b"ERROR", b"Discovery agent failed")]
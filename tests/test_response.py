@@ -0,0 +1,42 @@
+from __future__ import absolute_import
+
+import io
+import unittest
+
+import requests
+
+from xled.exceptions import ApplicationError
+from xled.response import build_response
+
+
+def make_response(content, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(content)
+    return response
+
+
+class TestApplicationResponse(unittest.TestCase):
+    """Tests for `xled.response` module."""
+
+    def test_data(self):
+        app_response = build_response(make_response(b'{"code":1000,"name":"Cafe"}'))
+        assert app_response.data == {"code": 1000, "name": "Cafe"}
+        assert app_response.status_code == 1000
+        assert app_response.ok
+
+    def test_non_utf8(self):
+        app_response = build_response(make_response(b'{"code":1000,"name":"Caf\xe9"}'))
+        assert app_response["code"] == 1000
+        assert app_response["name"] == u"Caf\xe9"
+
+    def test_invalid(self):
+        app_response = build_response(make_response(b"Not JSON"))
+        with self.assertRaises(ApplicationError):
+            app_response.data
+
+    def test_application_error(self):
+        app_response = build_response(make_response(b'{"code":1001}'))
+        assert not app_response.ok
+        with self.assertRaises(ApplicationError):
+            app_response.raise_for_status()
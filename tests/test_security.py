@@ -1,7 +1,11 @@
 from __future__ import absolute_import
 
+import io
+import tempfile
 import unittest
 
+import netaddr
+
 from xled import security
 
 
@@ -34,6 +38,11 @@ class TestXorStrings(unittest.TestCase):
         cipher = security.xor_strings(mac_packed, b"\x01")
         assert b']\xce~\xa0"J' == cipher
 
+    def test_empty_key(self):
+        mac_packed = b"\\\xcf\x7f\xa1#K"
+        cipher = security.xor_strings(mac_packed, b"")
+        assert b"" == cipher
+
     def test_invalid_message_none(self):
         with self.assertRaises(TypeError):
             security.xor_strings(None, b"\x01")
@@ -115,3 +124,50 @@ class TestDeriveKey(unittest.TestCase):
         assert expected_secret_key == security.derive_key(
             security.SHARED_KEY_WIFI, MAC_ADDRESS_TEST
         )
+
+    def test_mac_address_formats(self):
+        expected_secret_key = b"9\xb9\x1a]\xc7\x90.\xaa\x0cV\xc9\x8d9\xbb^\x12"
+        for mac_address in ("5c-cf-7f-33-aa-ff", "5CCF7F33AAFF", "5ccf.7f33.aaff"):
+            assert expected_secret_key == security.derive_key(
+                security.SHARED_KEY_CHALLANGE, mac_address
+            )
+
+    def test_malformed_mac_address(self):
+        for mac_address in ("5ccf7f33:aaff", "5c-cf-7f:33aaff"):
+            with self.assertRaises(netaddr.AddrFormatError):
+                security.derive_key(security.SHARED_KEY_CHALLANGE, mac_address)
+
+
+class ReadOnlyFile(object):
+    """File-like object that supports only read()"""
+
+    def __init__(self, data):
+        self._fileobj = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._fileobj.read(size)
+
+
+class TestSha1sum(unittest.TestCase):
+    """Tests for sha1sum() from `xled.security` module."""
+
+    DATA = b"Twinkly" * 20000
+    EXPECTED = "d218143ddc2e3f21a6e1e25e848f7a375558077c"
+
+    def test_binary_file(self):
+        assert self.EXPECTED == security.sha1sum(io.BytesIO(self.DATA))
+
+    def test_read_only(self):
+        assert self.EXPECTED == security.sha1sum(ReadOnlyFile(self.DATA))
+
+    def test_position(self):
+        fileobj = io.BytesIO(b"header" + self.DATA)
+        fileobj.read(6)
+        assert self.EXPECTED == security.sha1sum(fileobj)
+        assert fileobj.tell() == len(self.DATA) + 6
+
+    def test_real_file_position(self):
+        with tempfile.TemporaryFile() as fileobj:
+            fileobj.write(b"header" + self.DATA)
+            fileobj.seek(6)
+            assert self.EXPECTED == security.sha1sum(fileobj)
@@ -0,0 +1,32 @@
+from __future__ import absolute_import
+
+import unittest
+
+from xled import util
+
+
+class TestParseMacAddress(unittest.TestCase):
+    """Tests for parse_mac_address() from `xled.util` module."""
+
+    PACKED = b"\\\xcf\x7f3\xaa\xff"
+
+    def test_formats(self):
+        for mac_address in (
+            "5C:CF:7F:33:AA:FF",
+            "5c-cf-7f-33-aa-ff",
+            "5ccf7f33aaff",
+            b"5c:cf:7f:33:aa:ff",
+        ):
+            assert self.PACKED == util.parse_mac_address(mac_address)
+
+    def test_unrecognized(self):
+        for mac_address in (
+            "5ccf7f33:aaff",
+            "5c-cf-7f:33:aa:ff",
+            "5c:cf:7f:33:aa",
+            "5ccf.7f33.aaff",
+            "5c:cf:7f:33:aa:ff\n",
+            b"5c:cf:7f:33:aa:\xff",
+            None,
+        ):
+            assert util.parse_mac_address(mac_address) is None
@@ -118,7 +118,7 @@ class ChallengeResponseAuth(AuthBase):
         response.raw.release_conn()
 
         challenge = xled.security.generate_challenge()
-        log.debug("authenticate(): Challenge: %s", repr(challenge))
+        log.debug("authenticate(): Challenge: %r", challenge)
         login_successfull = self.send_challenge(response, challenge)
         if not login_successfull:
             return response
@@ -39,6 +39,11 @@ except ImportError:
     else:
         raise
 
+try:
+    from orjson import loads as json_loads  # noqa
+except ImportError:
+    from json import loads as json_loads  # noqa
+
 
 if is_py2:
     import itertools
@@ -67,3 +72,48 @@ if is_py2:
 
 elif is_py3:
     from time import monotonic  # noqa
+
+
+if is_py2:
+    import Queue as queue  # noqa
+
+elif is_py3:
+    import queue  # noqa
+
+
+if is_py2:
+    from backports.functools_lru_cache import lru_cache  # noqa
+
+elif is_py3:
+    from functools import lru_cache  # noqa
+
+
+if is_py2:
+    import select
+
+    #: Event mask of readiness for reading, see :py:mod:`selectors`
+    EVENT_READ = 1
+
+    class DefaultSelector(object):
+        """
+        Subset of :py:class:`selectors.DefaultSelector` built on select()
+
+        Only waiting for reading is supported. :py:meth:`select` returns
+        pairs of registered file objects and events instead of keys.
+        """
+
+        def __init__(self):
+            self._fileobjs = []
+
+        def register(self, fileobj, events, data=None):
+            self._fileobjs.append(fileobj)
+
+        def select(self, timeout=None):
+            readable, _, _ = select.select(self._fileobjs, [], [], timeout)
+            return [(fileobj, EVENT_READ) for fileobj in readable]
+
+        def close(self):
+            self._fileobjs = []
+
+elif is_py3:
+    from selectors import EVENT_READ, DefaultSelector  # noqa
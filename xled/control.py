@@ -18,6 +18,7 @@ This module contains interface to control specific device
 from __future__ import absolute_import
 
 import collections
+import datetime
 import io
 import logging
 import struct
@@ -28,7 +29,6 @@ import xled.util
 import xled.security
 from xled.udp_client import UDPClient
 from xled.auth import BaseUrlChallengeResponseAuthSession
-from xled.compat import xrange
 from xled.exceptions import HighInterfaceError
 from xled.response import ApplicationResponse
 
@@ -915,30 +915,35 @@ class ControlInterface(object):
         :param int leds_number: the number of leds (only used in version 1)
         :rtype: None
         """
+        token = base64.b64decode(self.session.access_token)
         if version == 1:
             # Send single frame, generation I
             packet = bytearray(b"\x01")
-            packet.extend(base64.b64decode(self.session.access_token))
+            packet.extend(token)
             packet.extend(struct.pack(">B", leds_number))
             packet.extend(frame.read())
             self.udpclient.send(packet)
         elif version == 2:
             # Send single frame, generation II pre 2.4.14
             packet = bytearray(b"\x02")
-            packet.extend(base64.b64decode(self.session.access_token))
+            packet.extend(token)
             packet.extend(b"\x00")
             packet.extend(frame.read())
             self.udpclient.send(packet)
         else:
             # Send multi frame, generation II post 2.4.14
             packet_size = 900
+            # Header is the same for every fragment except for the trailing
+            # fragment index, so build it once and reuse the buffer
+            packet = bytearray(b"\x03")
+            packet.extend(token)
+            packet.extend(b"\x00\x00\x00")
+            header_size = len(packet)
             data_packet = frame.read(packet_size)
             i = 0
             while data_packet:
-                packet = bytearray(b"\x03")
-                packet.extend(base64.b64decode(self.session.access_token))
-                packet.extend(b"\x00\x00")
-                packet.extend(struct.pack(">B", i))
+                packet[header_size - 1] = i
+                del packet[header_size:]
                 packet.extend(data_packet)
                 self.udpclient.send(packet)
                 data_packet = frame.read(packet_size)
@@ -1102,23 +1107,25 @@ class HighControlInterface(ControlInterface):
             )
             raise HighInterfaceError(msg)
 
+        # Read local clock only once for all formatted times
+        local_now = datetime.datetime.now()
         now = device_response["time_now"]
-        now_formatted = xled.util.date_from_seconds_after_midnight(now).strftime(
-            TIME_FORMAT
-        )
+        now_formatted = xled.util.date_from_seconds_after_midnight(
+            now, local_now
+        ).strftime(TIME_FORMAT)
 
         if device_response["time_on"] == -1 and device_response["time_off"] == -1:
             return Timer(now_formatted, False, False)
 
         on = device_response["time_on"]
-        on_formatted = xled.util.date_from_seconds_after_midnight(on).strftime(
-            TIME_FORMAT
-        )
+        on_formatted = xled.util.date_from_seconds_after_midnight(
+            on, local_now
+        ).strftime(TIME_FORMAT)
 
         off = device_response["time_on"]
-        off_formatted = xled.util.date_from_seconds_after_midnight(off).strftime(
-            TIME_FORMAT
-        )
+        off_formatted = xled.util.date_from_seconds_after_midnight(
+            off, local_now
+        ).strftime(TIME_FORMAT)
 
         return Timer(now_formatted, on_formatted, off_formatted)
 
@@ -1137,8 +1144,7 @@ class HighControlInterface(ControlInterface):
         assert green in range(0, 256)
         assert blue in range(0, 256)
         bytes_str = struct.pack(">BBB", red, green, blue)
-        for position in xrange(size):
-            file_obj.write(bytes_str)
+        file_obj.write(bytes_str * size)
 
     def set_static_color(self, red, green, blue):
         """
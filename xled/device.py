@@ -52,6 +52,16 @@ class Device(Mapping):
     )
     #: These names are properties that can be accessed as items of Mapping.
     ATTRS = PROPERTIES + NETWORK_STATUS + DEVICE_INFO + TIMER_INFO
+    #: Maps item name to a property holding it. None for separate properties.
+    #: Latter groups take precedence, e.g. "mode" is a separate property.
+    #: Items are read from memoized responses directly without filtering as
+    #: only names from respective groups are dispatched to them.
+    _DISPATCH = dict(
+        [(key, "timer_info") for key in TIMER_INFO]
+        + [(key, "_network_status") for key in NETWORK_STATUS]
+        + [(key, "_device_info") for key in DEVICE_INFO]
+        + [(key, None) for key in PROPERTIES]
+    )
 
     def __init__(self, control_interface):
         self._control = control_interface
@@ -85,21 +95,13 @@ class Device(Mapping):
 
     @property
     def device_info(self):
-        info = {}
-        for key in self.DEVICE_INFO:
-            if key not in self._device_info:
-                continue
-            info[key] = self._device_info[key]
-        return info
+        info = self._device_info
+        return {key: info[key] for key in self.DEVICE_INFO if key in info}
 
     @property
     def network_status(self):
-        status = {}
-        for key in self.NETWORK_STATUS:
-            if key not in self._network_status:
-                continue
-            status[key] = self._network_status[key]
-        return status
+        status = self._network_status
+        return {key: status[key] for key in self.NETWORK_STATUS if key in status}
 
     @property
     def timer_info(self):
@@ -141,14 +143,10 @@ class Device(Mapping):
         return fw_version["version"]
 
     def __getitem__(self, key):
-        if key in self.PROPERTIES:
+        source = self._DISPATCH[key]
+        if source is None:
             return getattr(self, key)
-        elif key in self.DEVICE_INFO:
-            return self.device_info[key]
-        elif key in self.NETWORK_STATUS:
-            return self.network_status[key]
-        elif key in self.TIMER_INFO:
-            return self.timer_info[key]
+        return getattr(self, source)[key]
 
     def __iter__(self):
         return iter(self.ATTRS)
@@ -9,27 +9,33 @@ This module contains interface for discovery devices on the network
 
 from __future__ import absolute_import
 
+import binascii
 import logging
-import time
-import uuid
+import socket
 import collections
+import errno
+import functools
+import heapq
+import re
 import requests
 
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
 
-import ipaddress
-import zmq
-import tornado.log
-from tornado.ioloop import IOLoop, PeriodicCallback
-from zmq.eventloop.zmqstream import ZMQStream
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from xled import udp_client
-from xled.compat import basestring, is_py3, monotonic
-from xled.exceptions import ReceiveTimeout, DiscoverTimeout
-
-if is_py3:
-    import asyncio
-    import tornado.platform.asyncio
+from xled.compat import (
+    EVENT_READ,
+    DefaultSelector,
+    basestring,
+    is_py3,
+    monotonic,
+    queue,
+)
+from xled.exceptions import DiscoverTimeout
+from xled.util import parse_mac_address
 
 
 # Some time in the future improve logging, e.g.
@@ -39,12 +45,31 @@ log = logging.getLogger(__name__)
 
 #: Message to send in ping requests
 PING_MESSAGE = b"\x01discover"
+#: Length of :py:const:`PING_MESSAGE`
+PING_MESSAGE_LENGTH = len(PING_MESSAGE)
 #: Default port number to send pings
 PING_PORT_NUMBER = 5555
 #: Interval in seconds
 PING_INTERVAL = 1.0
 #: After how many seconds the device is considered offline
 PEER_EXPIRY = 5.0
+#: Number of threads fetching MAC addresses of devices in parallel
+MAC_ADDRESS_WORKERS = 8
+#: Connect and read timeouts in seconds of requests for MAC address
+MAC_ADDRESS_TIMEOUT = (0.5, 1.0)
+#: For how many seconds a fetched MAC address is reused for the same IP address
+MAC_ADDRESS_CACHE_TTL = 60.0
+#: Maximum number of IP addresses to remember MAC addresses for
+MAC_ADDRESS_CACHE_SIZE = 256
+#: Matches MAC address in JSON response of gestalt call
+GESTALT_MAC_RE = re.compile(br'"mac"\s*:\s*"([0-9a-fA-F:]+)"')
+#: Kernel's ARP table on Linux
+ARP_TABLE_PATH = "/proc/net/arp"
+
+#: Device found by :py:func:`xdiscover`
+DiscoveredDevice = collections.namedtuple(
+    "DiscoveredDevice", ["hw_address", "id", "ip_address"]
+)
 
 
 def xdiscover(find_id=None, destination_host=None, timeout=None):
@@ -74,21 +99,15 @@ def xdiscover(find_id=None, destination_host=None, timeout=None):
                 response = interface.recv()
             except KeyboardInterrupt:
                 raise
-            assert len(response) > 0
+            if not response:
+                raise RuntimeError("Received empty message from discovery.")
             event = response.pop(0)
             if event == b"JOINED":
-                assert len(response) == 3
-                hw_address, device_id, ip_address = response
-                if isinstance(hw_address, bytes):
-                    hw_address = hw_address.decode("utf-8")
-                if isinstance(device_id, bytes):
-                    device_id = device_id.decode("utf-8")
-                if isinstance(ip_address, bytes):
-                    ip_address = ip_address.decode("utf-8")
+                # Agent always sends bytes
+                hw_address, device_id, ip_address = (
+                    part.decode("utf-8") for part in response
+                )
                 if find_id is None or find_id == device_id:
-                    DiscoveredDevice = collections.namedtuple(
-                        "DiscoveredDevice", ["hw_address", "id", "ip_address"]
-                    )
                     yield DiscoveredDevice(hw_address, device_id, ip_address)
                     if find_id == device_id:
                         return
@@ -126,24 +145,6 @@ def discover(find_id=None, destination_host=None, timeout=None):
     )
 
 
-def pipe(ctx):
-    """
-    Create an inproc PAIR pipe
-
-    Used for communicating between parent and children.
-
-    :param ctx: :class:`zmq.Context` object.
-    :return: parent socket, child socket.
-    :rtype: tuple
-    """
-    parent_socket = ctx.socket(zmq.PAIR)
-    child_socket = ctx.socket(zmq.PAIR)
-    url = "inproc://{uuid}".format(uuid=uuid.uuid1())
-    parent_socket.bind(url)
-    child_socket.connect(url)
-    return parent_socket, child_socket
-
-
 class DiscoveryInterface(object):
     """
     Main interface to discover devices on the network
@@ -153,23 +154,17 @@ class DiscoveryInterface(object):
     """
 
     def __init__(self, destination_host=None, receive_timeout=None):
-        # As of 15.0, pyzmq supports asyncio. Asyncio requries Python 3.
-        if is_py3:
-            asyncio.set_event_loop_policy(
-                tornado.platform.asyncio.AnyThreadEventLoopPolicy()
-            )
-        self.ctx = zmq.Context()
-        p0, p1 = pipe(self.ctx)
+        self.receive_timeout = receive_timeout
+        self.pipe = queue.Queue()
+        #: Messages received in a batch from the agent but not yet returned
+        self._received = collections.deque()
         self.agent = InterfaceAgent(
-            self.ctx,
-            p1,
+            self.pipe,
             destination_host=destination_host,
             receive_timeout=receive_timeout,
         )
         self.agent_thread = Thread(target=self.agent.start)
         self.agent_thread.start()
-        self.pipe = p0
-        self._agent_pipe = p1
 
     def __del__(self):
         try:
@@ -185,24 +180,29 @@ class DiscoveryInterface(object):
 
     def stop(self):
         """
-        Stop ping agent and close pipe for communication with callee
+        Stop ping agent
         """
         log.debug("Stopping Agent thread.")
         self.agent.stop()
         log.debug("Waiting for Agent thread to join us.")
         self.agent_thread.join()
-        log.debug("Closing main thread part of the pipe")
-        self.pipe.close()
-        log.debug("Closing agent thread part of the pipe")
-        self._agent_pipe.close()
-        log.debug("Terminating context")
-        self.ctx.term()
 
     def recv(self):
         """
         Receive a message from the interface
+
+        If no message arrives within receive timeout RECEIVE_TIMEOUT message is
+        returned instead.
+
+        :return: message parts with event name first
+        :rtype: list
         """
-        return self.pipe.recv_multipart()
+        if not self._received:
+            try:
+                self._received.extend(self.pipe.get(timeout=self.receive_timeout))
+            except queue.Empty:
+                return [b"RECEIVE_TIMEOUT"]
+        return list(self._received.popleft())
 
 
 # =====================================================================
@@ -215,9 +215,7 @@ def decode_discovery_response(data):
     """
     log.debug("Received %r", data)
     if is_py3:
-        if isinstance(data, bytes):
-            data = bytearray(data)
-        if not isinstance(data, bytearray):
+        if not isinstance(data, (bytes, bytearray)):
             msg = "Data must be bytearray. Was {type_of_data} instead".format(
                 type_of_data=type(data)
             )
@@ -240,51 +238,68 @@ def decode_discovery_response(data):
             )
         )
         raise ValueError(msg)
-    if is_py3:
-        tail = 0
-    else:
-        tail = b"\x00"
-    if data[-1] != tail:
+    if data[-1:] != b"\x00":
         msg = (
             "Expected zero character on the end of message. "
-            "Was {data_last_char!r} instead.".format(data_last_char=data[-1])
+            "Was {data_last_char!r} instead.".format(data_last_char=data[-1:])
         )
         raise ValueError(msg)
 
     # First four bytes in reversed order
-    ip_address_data = data[3::-1]
-    if is_py3:
-        ip_address_data = bytes(ip_address_data)
-    else:
-        # Detect if ipaddress is backport to python 2 - py2-ipaddress
-        if (
-            hasattr(ipaddress, "bytes")
-            and hasattr(ipaddress, "bytearray")
-            and ipaddress.bytes == ipaddress.bytearray
-        ):
-            # py2-ipaddress differs from ipaddress by Google and python 3
-            # module:
-            #     Since Python 2 has no distinct bytes type, bytearray is used
-            #     instead for the "packed" (binary) address representation
-            ip_address_data = bytearray(ip_address_data)
-
-    ip_address_obj = ipaddress.ip_address(ip_address_data)
-    ip_address_exploded = ip_address_obj.exploded
-    if is_py3:
-        if not isinstance(ip_address_exploded, bytes):
-            ip_address_exploded = bytes(ip_address_exploded, "utf-8")
-    else:
-        ip_address_exploded = ip_address_exploded.encode("utf-8")
-
-    device_id = data[6:-1]
-    if is_py3:
-        device_id = bytes(device_id)
-    else:
-        device_id = device_id.encode("utf-8")
+    ip_address_exploded = socket.inet_ntoa(bytes(data[3::-1])).encode("ascii")
+    device_id = bytes(data[6:-1])
 
     return ip_address_exploded, device_id
 
 
+def normalize_mac_address(hw_address):
+    """
+    Converts MAC address to lowercase hexadecimal pairs separated by colons
+
+    Both sources of MAC addresses, ARP table and gestalt call, are normalized
+    so the same device is always tracked under one key.
+
+    :param bytes hw_address: MAC address
+    :return: normalized MAC address or None if it isn't recognized
+    :rtype: bytes or None
+    """
+    packed = parse_mac_address(hw_address)
+    if packed is None:
+        return None
+    digits = binascii.hexlify(packed)
+    return b":".join(digits[i : i + 2] for i in range(0, len(digits), 2))
+
+
+def arp_lookup(ip_address, path=ARP_TABLE_PATH):
+    """
+    Looks up MAC address of ip_address in kernel's ARP table
+
+    The table is only available on Linux. Incomplete entries are ignored.
+
+    :param bytes ip_address: IP address of a device
+    :param str path: (optional) path to the ARP table
+    :return: The MAC address normalized by :py:func:`normalize_mac_address`,
+        or None if not found
+    :rtype: bytes or None
+    """
+    ip = ip_address.decode("ascii")
+    try:
+        with open(path) as arp_table:
+            # Skip header
+            next(arp_table, None)
+            for line in arp_table:
+                fields = line.split()
+                if len(fields) < 4 or fields[0] != ip:
+                    continue
+                flags = int(fields[2], 16)
+                if flags == 0 or fields[3] == "00:00:00:00:00:00":
+                    return None
+                return normalize_mac_address(fields[3].encode("ascii"))
+    except (IOError, OSError, ValueError):
+        return None
+    return None
+
+
 class Peer(object):
     """
     Each object of this class represents one device on the network
@@ -292,13 +307,17 @@ class Peer(object):
     :param hw_address: Hardware (MAC) address of a device.
     :param device_id: Id of the device.
     :param ip_address: IP address of a device.
+    :param list expiry_heap: (optional) heap to push expiry time and HW
+        address to whenever the expiry time is reset.
+    :param float now: (optional) current monotonic time.
     """
 
-    def __init__(self, hw_address, device_id, ip_address):
+    def __init__(self, hw_address, device_id, ip_address, expiry_heap=None, now=None):
         self.hw_address = hw_address
         self.ip_address = ip_address
         self.device_id = device_id
-        self.is_alive()
+        self.expiry_heap = expiry_heap
+        self.is_alive(now)
 
     def __repr__(self):
         return "{class_name}({hw_address!r}) device_id({device_id!r})".format(
@@ -307,13 +326,20 @@ class Peer(object):
             device_id=self.device_id,
         )
 
-    def is_alive(self):
+    def is_alive(self, now=None):
         """
         Reset the peers expiry time
 
         Call this method whenever we get any activity from a peer.
+
+        :param float now: (optional) current monotonic time. Read from the
+            clock if not set.
         """
-        self.expires_at = time.time() + PEER_EXPIRY
+        if now is None:
+            now = monotonic()
+        self.expires_at = now + PEER_EXPIRY
+        if self.expiry_heap is not None:
+            heapq.heappush(self.expiry_heap, (self.expires_at, self.hw_address))
 
 
 class InterfaceAgent(object):
@@ -322,19 +348,15 @@ class InterfaceAgent(object):
 
     This way it can be passed around cleanly to methods that need it.
 
-    :param ctx: :class:`zmq.Context` object.
-    :param pipe: Pipe back to the main thread of to pass messages.
-    :param loop: (optional) loop to use.
+    :param pipe: :class:`queue.Queue` back to the main thread to pass lists
+        of messages.
     """
 
-    def __init__(
-        self, ctx, pipe, loop=None, destination_host=None, receive_timeout=None
-    ):
-        self.ctx = ctx
+    def __init__(self, pipe, destination_host=None, receive_timeout=None):
         self.pipe = pipe
-        if loop is None:
-            loop = IOLoop.instance()
-        self.loop = loop
+        #: Messages waiting to be sent to the main thread in one batch
+        self._outbox = []
+        self._stopped = Event()
         log.debug("InterfaceAgent destination_host=%s.", destination_host)
         if destination_host:
             udp = udp_client.UDPClient(
@@ -346,29 +368,57 @@ class InterfaceAgent(object):
             udp = udp_client.UDPClient(
                 PING_PORT_NUMBER, broadcast=True, receive_timeout=receive_timeout
             )
+        # Read only when selector reports data so all pending packets can be
+        # drained without blocking
+        udp.handle.setblocking(False)
         self.udp = udp
         #: Hash of known peers, fast lookup
         self.peers = {}
-
-    def _close(self):
-        log.debug("Stopping periodic ping.")
-        self.periodic_ping.stop()
-        log.debug("Removing beacon handler.")
-        self.loop.remove_handler(self.udp.handle.fileno())
-        log.debug("Closing UDP client.")
-        self.loop.add_callback(self.udp.close)
-        log.debug("Stopping loop from agent")
-        self.loop.add_callback(self.loop.stop)
+        #: HW address of known peers by their IP address
+        self._ip_to_hw = {}
+        #: Heap of expiry times and HW addresses of peers. May contain stale
+        #: entries of peers that were seen alive since.
+        self._expiry_heap = []
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        self._http.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=MAC_ADDRESS_WORKERS)
+        #: IP addresses with MAC address fetch submitted but not finished yet
+        self._pending = set()
+        self._pending_lock = Lock()
+        #: Peers with resolved MAC address waiting to be processed by agent
+        self._resolved = queue.Queue()
+        #: MAC address, device ID and expiry time by IP address, oldest first
+        self._mac_cache = collections.OrderedDict()
+        self._mac_cache_lock = Lock()
+
+    def _wakeup(self):
+        """
+        Interrupts waiting for a beacon by sending empty datagram to ourselves
+        """
+        try:
+            port = self.udp.handle.getsockname()[1]
+            self.udp.handle.sendto(b"", ("127.0.0.1", port))
+        except Exception:
+            log.debug("Failed to wake up the loop. It will stop on next tick.")
 
     def stop(self):
         """
         Stop the loop of agent
         """
-        self._close()
+        if self._stopped.is_set():
+            return
+        log.debug("Stopping loop from agent")
+        self._stopped.set()
+        self._wakeup()
 
     def __del__(self):
         try:
-            self._close()
+            self.stop()
         except Exception:
             pass
 
@@ -376,26 +426,94 @@ class InterfaceAgent(object):
         """
         Main entry of the thread
 
-        Hooks necessary handlers to send pings, process incoming data and
-        mark peers offline if they doesn't respond for long time.
+        Sends pings, processes incoming data and marks peers offline if they
+        doesn't respond for long time until :py:meth:`stop` is called.
         """
         log.debug("Starting Agent")
-        self.loop = tornado.ioloop.IOLoop.current()
-        self.loop.add_handler(
-            self.udp.handle.fileno(), self.handle_beacon, self.loop.READ
-        )
-        stream = ZMQStream(self.pipe, self.loop)
-        stream.on_recv(self.control_message)
-        self.periodic_ping = PeriodicCallback(self.send_ping, PING_INTERVAL * 1000)
-        self.periodic_ping.start()
-        self.periodic_reap_peers = PeriodicCallback(
-            self.reap_peers, PING_INTERVAL * 1000
-        )
-        self.periodic_reap_peers.start()
-        log.debug("Starting Loop")
-        self.loop.start()
+        selector = DefaultSelector()
+        try:
+            selector.register(self.udp.handle, EVENT_READ)
+            self._loop(selector)
+        except Exception:
+            log.exception("Discovery agent failed")
+            self._send_to_pipe([b"ERROR", b"Discovery agent failed"])
+            self._flush_outbox()
+        finally:
+            selector.close()
+            log.debug("Shutting down MAC address workers.")
+            self._shutdown_workers()
+            log.debug("Closing UDP client.")
+            self.udp.close()
         log.debug("Loop ended")
 
+    def _loop(self, selector):
+        """
+        Waits for beacons and runs periodic tasks until stopped
+
+        :param selector: selector with UDP socket registered for reading
+        """
+        next_tick = monotonic()
+        log.debug("Starting Loop")
+        while not self._stopped.is_set():
+            wait = max(0.0, next_tick - monotonic())
+            readable = selector.select(wait)
+            if self._stopped.is_set():
+                break
+            if readable:
+                try:
+                    self.handle_beacon()
+                except Exception:
+                    log.exception("Failed to handle beacon")
+            self.process_resolved_peers()
+            now = monotonic()
+            if now >= next_tick:
+                self._tick()
+                # Keep ticks aligned to the schedule but don't try to catch up
+                # on missed ones, e.g. after the system was suspended
+                next_tick += PING_INTERVAL
+                if next_tick < now:
+                    next_tick = now + PING_INTERVAL
+            self._flush_outbox()
+
+    def _shutdown_workers(self):
+        """
+        Cancels queued MAC address fetches without waiting for running ones
+
+        HTTP session is closed in a background thread once all workers
+        finished as they may still use it.
+        """
+        try:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        except TypeError:
+            # Python < 3.9
+            self._executor.shutdown(wait=False)
+        closer = Thread(target=self._close_http)
+        closer.daemon = True
+        closer.start()
+
+    def _close_http(self):
+        """
+        Closes HTTP session after all MAC address workers finished
+        """
+        self._executor.shutdown(wait=True)
+        self._http.close()
+
+    def _tick(self):
+        """
+        Sends ping and removes expired peers
+
+        Runs periodically. Failure of one doesn't prevent the other from
+        running.
+        """
+        try:
+            self.send_ping()
+        except Exception:
+            log.exception("Failed to send ping")
+        try:
+            self.reap_peers()
+        except Exception:
+            log.exception("Failed to reap peers")
+
     def send_ping(self, *args, **kwargs):
         """
         Sends ping message
@@ -410,119 +528,226 @@ class InterfaceAgent(object):
             log.exception("Failed to send ping")
             self.stop()
 
-    def control_message(self, event):
-        """
-        Respond to control message from main application thread
-
-        Currently unused.
-
-        :param event: anything.
-        """
-        log.debug("control message: %s", event)
-
-    def _send_to_pipe_multipart(self, msg_parts):
+    def _send_to_pipe(self, msg_parts):
         """
-        Handle errors while sending message to pipe as ERROR message sent to pipe
+        Queue message for main application thread
 
-        Caller should catch use these messages to stop interface thread and thus
-        agent as well.
+        Messages are sent by :py:meth:`_flush_outbox` once per loop iteration.
 
-        :param iterable msg_parts: A sequence of objects to send as a multipart message.
-        :raises TypeError: after error is caught and ERROR message sent to pipe
+        :param iterable msg_parts: A sequence of message parts, event name first.
         """
         log.debug("Going to send %r.", msg_parts)
-        try:
-            self.pipe.send_multipart(msg_parts)
-        except TypeError as err:
-            log.error(
-                "Failed to send multipart message to pipe: %s",
-                getattr(err, "message", repr(err)),
-            )
-            self.pipe.send_multipart(
-                [b"ERROR", b"Failed to send a message to main thread."]
-            )
-            self.stop()
-            raise
+        self._outbox.append(tuple(msg_parts))
 
-    def _next_packet(self):
+    def _flush_outbox(self):
         """
-        Reads packet from nodes
-
-        :return: tuple received data, hostname
+        Send all queued messages to main application thread at once
         """
-        while True:
-            data, host = self.udp.recv(64)
-            return data, host
+        if self._outbox:
+            self.pipe.put(self._outbox)
+            self._outbox = []
 
-    def get_mac_address(self, ip_address):
+    def get_mac_address(self, ip_address, device_id=None):
         """
         Gets the MAC address of the device at ip_address.
 
+        The address is fetched from the device's gestalt and remembered for
+        :py:const:`MAC_ADDRESS_CACHE_TTL` seconds together with device ID from
+        the beacon. A remembered address is used only for the same device ID,
+        as the IP address may have been handed over to another device since.
+        Once it expires kernel's ARP table is consulted first and the
+        remembered address is reused if both match. ARP table alone isn't
+        trusted as it holds address of the next hop on the link, e.g. a
+        MAC-translating repeater, which may differ from the address the device
+        reports itself.
+
         :param ip_address: The IP address or hostname to the device
-        :return: The MAC address, or None in case of failure
+        :param device_id: (optional) device ID decoded from a beacon
+        :return: The MAC address normalized by
+            :py:func:`normalize_mac_address`, or None in case of failure
         """
+        with self._mac_cache_lock:
+            entry = self._mac_cache.get(ip_address)
+        if entry is not None and entry[1] == device_id:
+            hw_address, _device_id, expires_at = entry
+            if expires_at > monotonic():
+                return hw_address
+            if arp_lookup(ip_address) == hw_address:
+                self._cache_mac_address(ip_address, hw_address, device_id)
+                return hw_address
+
         ip = ip_address.decode("utf-8")
 
         base_url = "http://{ip}/xled/v1/gestalt".format(ip=ip)
-        r = requests.get(base_url)
+        r = self._http.get(base_url, timeout=MAC_ADDRESS_TIMEOUT)
         if r.status_code != 200:
             log.error(
                 "Failure getting MAC address from device at %s. Not a Twinkly?", ip
             )
             return None
 
-        try:
-            hw_address = r.json().get("mac").encode("utf-8")
-            return hw_address
-        except Exception:
+        match = GESTALT_MAC_RE.search(r.content)
+        if match is None:
+            return None
+        hw_address = normalize_mac_address(match.group(1))
+        if hw_address is None:
             return None
+        self._cache_mac_address(ip_address, hw_address, device_id)
+        return hw_address
 
-    def handle_beacon(self, fd, event):
+    def _cache_mac_address(self, ip_address, hw_address, device_id=None):
         """
-        Reads response from nodes
+        Remembers MAC address of a device at ip_address
 
-        Creates :class:`Peer` objects and tracks them in `self.peers`. Finally
-        sends messages through pipe to main application thread.
+        Evicts the oldest entry if cache is full.
 
-        :param fd: not used
-        :param event: not used
+        :param ip_address: The IP address or hostname to the device
+        :param hw_address: The MAC address of the device
+        :param device_id: (optional) device ID from the beacon the address
+            was fetched for
         """
-        log.debug("Waiting for a beacon.")
-        try:
-            data, host = self._next_packet()
-        except ReceiveTimeout:
-            msg_parts = [b"RECEIVE_TIMEOUT"]
+        expires_at = monotonic() + MAC_ADDRESS_CACHE_TTL
+        with self._mac_cache_lock:
+            self._mac_cache.pop(ip_address, None)
+            self._mac_cache[ip_address] = (hw_address, device_id, expires_at)
+            if len(self._mac_cache) > MAC_ADDRESS_CACHE_SIZE:
+                self._mac_cache.popitem(last=False)
+
+    def _forget_mac_address(self, ip_address):
+        """
+        Removes cached MAC address of a device at ip_address
+
+        :param ip_address: The IP address or hostname to the device
+        """
+        with self._mac_cache_lock:
+            self._mac_cache.pop(ip_address, None)
+
+    def handle_beacon(self):
+        """
+        Reads all pending responses from nodes
+
+        Each packet is processed by :py:meth:`process_beacon`.
+        """
+        log.debug("Reading beacons.")
+        now = monotonic()
+        recvfrom = self.udp.handle.recvfrom
+        while True:
+            try:
+                data, (host, _port) = recvfrom(64)
+            except socket.error as err:
+                if err.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                if err.errno in (errno.ECONNREFUSED, errno.ECONNRESET):
+                    # ICMP port unreachable reported for previously sent ping
+                    log.debug("Ping was refused: %s", err)
+                    continue
+                raise
             try:
-                self._send_to_pipe_multipart(msg_parts)
+                self.process_beacon(data, host, now)
             except Exception:
-                return
+                log.exception("Failed to process beacon from %s.", host)
+
+    def process_beacon(self, data, host, now=None):
+        """
+        Processes single response from a node
+
+        Decodes the beacon and schedules fetch of MAC address of the device
+        in a worker thread unless one for the same IP address is still in
+        flight. Result is later handled by :py:meth:`process_resolved_peers`.
+
+        :param bytes data: received packet
+        :param str host: address of the sender
+        :param float now: (optional) monotonic time the packet was received
+        """
+        if not data:
+            log.debug("Woken up by empty message from %s.", host)
             return
-        if data == PING_MESSAGE:
+        if len(data) == PING_MESSAGE_LENGTH and data == PING_MESSAGE:
             log.debug("Ignoring ping message received from network from %s.", host)
             return
         log.debug("Received a beacon from %s.", host)
         ip_address, device_id = decode_discovery_response(data)
         # if host != ip_address:
         # print("Host {host} != ip_address {ip_address}".format(host=host, ip_address=ip_address))
+        hw_address = self._ip_to_hw.get(ip_address)
+        if hw_address in self.peers and self.peers[hw_address].device_id == device_id:
+            log.debug("Peer %s seen before.", hw_address)
+            return self.process_seen_peer(hw_address, device_id, ip_address, now)
+        with self._pending_lock:
+            if ip_address in self._pending:
+                log.debug("Hardware address of %s is being fetched.", ip_address)
+                return
+            self._pending.add(ip_address)
         log.debug("Getting hardware address of %s.", ip_address)
-        hw_address = self.get_mac_address(ip_address)
+        try:
+            future = self._executor.submit(self.get_mac_address, ip_address, device_id)
+        except Exception:
+            with self._pending_lock:
+                self._pending.discard(ip_address)
+            raise
+        future.add_done_callback(
+            functools.partial(self._mac_address_resolved, device_id, ip_address)
+        )
+
+    def _mac_address_resolved(self, device_id, ip_address, future):
+        """
+        Passes result of MAC address fetch back to the agent loop
+
+        Runs in a worker thread.
+
+        :param str device_id: device ID decoded from a beacon
+        :param str ip_address: IP address decoded from a beacon
+        :param future: :class:`concurrent.futures.Future` of
+            :py:meth:`get_mac_address`
+        """
+        with self._pending_lock:
+            self._pending.discard(ip_address)
+        if future.cancelled():
+            return
+        try:
+            hw_address = future.result()
+        except Exception:
+            log.exception("Failed to get HW address of %s.", ip_address)
+            return
+        self._resolved.put((hw_address, device_id, ip_address))
+        self._wakeup()
+
+    def process_resolved_peers(self):
+        """
+        Processes all peers whose MAC address fetch has finished
+        """
+        now = monotonic()
+        while True:
+            try:
+                hw_address, device_id, ip_address = self._resolved.get_nowait()
+            except queue.Empty:
+                return
+            self.process_peer(hw_address, device_id, ip_address, now)
+
+    def process_peer(self, hw_address, device_id, ip_address, now=None):
+        """
+        Tracks peer in `self.peers` and sends out status message
+
+        :param hw_address: HW address of a device or None if it couldn't
+                           be determined.
+        :param str device_id: device ID decoded from a beacon
+        :param str ip_address: IP address decoded from a beacon
+        :param float now: (optional) current monotonic time
+        """
         if hw_address is None:
             log.error("Unable to get HW adress of %s.", ip_address)
             msg_parts = [b"ERROR", device_id, ip_address]
-            try:
-                self._send_to_pipe_multipart(msg_parts)
-            except Exception:
-                return
+            self._send_to_pipe(msg_parts)
             return
         # print("Host {ip_address} has MAC address {hw_address}".format(ip_address=ip_address, hw_address=hw_address))
         if hw_address in self.peers:
             log.debug("Peer %s seen before.", hw_address)
-            return self.process_seen_peer(hw_address, device_id, ip_address)
+            return self.process_seen_peer(hw_address, device_id, ip_address, now)
         else:
             log.debug("Never seen %s before.", hw_address)
-            return self.process_new_peer(hw_address, device_id, ip_address)
+            return self.process_new_peer(hw_address, device_id, ip_address, now)
 
-    def process_seen_peer(self, hw_address, device_id, ip_address):
+    def process_seen_peer(self, hw_address, device_id, ip_address, now=None):
         """
         Updates seen peer's info and sends out status message
 
@@ -535,32 +760,28 @@ class InterfaceAgent(object):
                                received a beacon. Must exist in list of peers.
         :param str device_id: device ID decoded from a beacon
         :param str ip_address: IP address decoded from a beacon
+        :param float now: (optional) current monotonic time
         """
-        assert hw_address in self.peers
-        self.peers[hw_address].is_alive()
-        if device_id != self.peers[hw_address].device_id:
-            old_device_id = self.peers[hw_address].device_id
-            self.peers[hw_address].device_id = device_id
+        peer = self.peers[hw_address]
+        peer.is_alive(now)
+        if device_id != peer.device_id:
+            old_device_id = peer.device_id
+            peer.device_id = device_id
             msg_parts = [b"RENAMED", hw_address, old_device_id, device_id]
-            try:
-                self._send_to_pipe_multipart(msg_parts)
-            except Exception:
-                return
-        if ip_address != self.peers[hw_address].ip_address:
-            old_ip_address = self.peers[hw_address].ip_address
-            self.peers[hw_address].ip_address = ip_address
+            self._send_to_pipe(msg_parts)
+        if ip_address != peer.ip_address:
+            old_ip_address = peer.ip_address
+            peer.ip_address = ip_address
+            self._forget_mac_address(old_ip_address)
+            if self._ip_to_hw.get(old_ip_address) == hw_address:
+                del self._ip_to_hw[old_ip_address]
+            self._ip_to_hw[ip_address] = hw_address
             msg_parts = [b"ADDRESS_CHANGED", hw_address, old_ip_address, ip_address]
-            try:
-                self._send_to_pipe_multipart(msg_parts)
-            except Exception:
-                return
+            self._send_to_pipe(msg_parts)
         msg_parts = [b"ALIVE", hw_address, device_id, ip_address]
-        try:
-            self._send_to_pipe_multipart(msg_parts)
-        except Exception:
-            return
+        self._send_to_pipe(msg_parts)
 
-    def process_new_peer(self, hw_address, device_id, ip_address):
+    def process_new_peer(self, hw_address, device_id, ip_address, now=None):
         """
         Adds new peer and sends out status message
 
@@ -573,28 +794,35 @@ class InterfaceAgent(object):
                                peers.
         :param str device_id: device ID decoded from a beacon
         :param str ip_address: IP address decoded from a beacon
+        :param float now: (optional) current monotonic time
         """
-        assert hw_address not in self.peers
-        self.peers[hw_address] = Peer(hw_address, device_id, ip_address)
+        self.peers[hw_address] = Peer(
+            hw_address, device_id, ip_address, expiry_heap=self._expiry_heap, now=now
+        )
+        self._ip_to_hw[ip_address] = hw_address
         msg_parts = [b"JOINED", hw_address, device_id, ip_address]
-        try:
-            self._send_to_pipe_multipart(msg_parts)
-        except Exception:
-            return
+        self._send_to_pipe(msg_parts)
 
-    def reap_peers(self):
+    def reap_peers(self, now=None):
         """
         Removes peers whose activity wasn't seen for a long time
 
         Called periodically. Sends messages through pipe to main application
         thread.
+
+        :param float now: (optional) current monotonic time
         """
-        now = time.time()
-        for peer in list(self.peers.values()):
-            if peer.expires_at < now:
-                self.peers.pop(peer.hw_address)
-                msg_parts = [b"LEFT", peer.hw_address]
-                try:
-                    self._send_to_pipe_multipart(msg_parts)
-                except Exception:
-                    return
+        if now is None:
+            now = monotonic()
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, hw_address = heapq.heappop(heap)
+            peer = self.peers.get(hw_address)
+            if peer is None or peer.expires_at != expires_at:
+                # Stale entry, peer was seen alive since
+                continue
+            del self.peers[hw_address]
+            if self._ip_to_hw.get(peer.ip_address) == hw_address:
+                del self._ip_to_hw[peer.ip_address]
+                self._forget_mac_address(peer.ip_address)
+            self._send_to_pipe((b"LEFT", hw_address))
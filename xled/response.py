@@ -3,7 +3,7 @@
 from __future__ import absolute_import
 
 from xled.exceptions import ApplicationError
-from xled.compat import JSONDecodeError, Mapping
+from xled.compat import Mapping, json_loads
 
 
 class ApplicationResponse(Mapping):
@@ -15,16 +15,22 @@ class ApplicationResponse(Mapping):
     :type response: :class:`requests.Response <Response>` or None
     """
 
+    __slots__ = ("response", "_data", "_content_consumed", "_status_code")
+
     def __init__(self, response=None):
         self.response = response
 
         self._data = False
         self._content_consumed = False
+        self._status_code = None
 
     @property
     def status_code(self):
         """Integer Code of responded application status, e.g. 1000 or 1001"""
-        return self.data.get("code", None)
+        if self._data is False:
+            # Parsing the content caches status code as well
+            return self.data.get("code", None)
+        return self._status_code
 
     @property
     def ok(self):
@@ -64,14 +70,22 @@ class ApplicationResponse(Mapping):
             else:
                 self.response.raise_for_status()
                 try:
-                    json_data = self.response.json()
-                except JSONDecodeError:
-                    msg = "Failed to decode application data: {text}".format(
-                        text=self.response.text
-                    )
-                    raise ApplicationError(msg, response=self.response)
-                self._data = dict(json_data)
-
+                    json_data = json_loads(self.response.content)
+                except ValueError:
+                    # Not JSON or not UTF-8, let requests guess the encoding
+                    try:
+                        json_data = self.response.json()
+                    except ValueError:
+                        msg = "Failed to decode application data: {text}".format(
+                            text=self.response.text
+                        )
+                        raise ApplicationError(msg, response=self.response)
+                if isinstance(json_data, dict):
+                    self._data = json_data
+                else:
+                    self._data = dict(json_data)
+
+            self._status_code = self._data.get("code", None)
             self._content_consumed = True
         return self._data
 
@@ -20,7 +20,8 @@ import itertools
 
 import netaddr
 
-from xled.compat import zip, is_py2
+from xled.compat import zip, is_py2, lru_cache
+from xled.util import parse_mac_address
 
 from arc4 import ARC4
 
@@ -61,12 +62,25 @@ def xor_strings(message, key):
     if is_py2:
         message = bytearray(message)
         key = bytearray(key)
-    ciphered = bytearray()
-    for m_char, k_char in zip(message, itertools.cycle(key)):
-        ciphered.append(m_char ^ k_char)
-    return bytes(ciphered)
-
-
+        return bytes(
+            bytearray(
+                m_char ^ k_char for m_char, k_char in zip(message, itertools.cycle(key))
+            )
+        )
+    length = len(message)
+    key_length = len(key)
+    if not key_length:
+        return b""
+    # Repeat key to length of the message and xor both as big integers
+    repeats, remainder = divmod(length, key_length)
+    repeated_key = key * repeats
+    if remainder:
+        repeated_key += key[:remainder]
+    ciphered = int.from_bytes(message, "big") ^ int.from_bytes(repeated_key, "big")
+    return ciphered.to_bytes(length, "big")
+
+
+@lru_cache(maxsize=32)
 def derive_key(shared_key, mac_address):
     """
     Derives secret key from shared key and MAC address
@@ -74,14 +88,29 @@ def derive_key(shared_key, mac_address):
     MAC address is repeated to length of key. Then bytes on corresponding
     positions are xor-ed. Finally a string is created.
 
+    Results are cached as the key is constant for a pair of shared key and
+    device, so both arguments need to be hashable.
+
     :param str shared_key: secret key
     :param str mac_address: MAC address in any format that netaddr.EUI
         recognizes
     :return: derived key
     :rtype: bytes
     """
-    mac = netaddr.EUI(mac_address)
-    return xor_strings(shared_key, mac.packed)
+    return xor_strings(shared_key, _mac_address_packed(mac_address))
+
+
+def _mac_address_packed(mac_address):
+    """
+    Converts MAC address to 6 bytes
+
+    Common formats recognized by :py:func:`xled.util.parse_mac_address` are
+    parsed directly. Anything else is left to netaddr.EUI.
+    """
+    packed = parse_mac_address(mac_address)
+    if packed is not None:
+        return packed
+    return netaddr.EUI(mac_address).packed
 
 
 def rc4(message, key):
@@ -93,8 +122,19 @@ def rc4(message, key):
     :return: ciphertext
     :rtype: str
     """
-    arc4 = ARC4(key)
-    return arc4.encrypt(message)
+    return xor_strings(message, _rc4_keystream(key, len(message)))
+
+
+@lru_cache(maxsize=16)
+def _rc4_keystream(key, length):
+    """
+    Returns first length bytes of RC4 keystream for key
+
+    Keys are derived from constant shared keys and device MAC address and
+    messages have fixed lengths, so the same keystream is needed over and
+    over again.
+    """
+    return ARC4(key).encrypt(b"\x00" * length)
 
 
 def generate_challenge():
@@ -183,15 +223,37 @@ def sha1sum(fileobj):
     Computes SHA1 from file-like object
 
     It is up to caller to open file for reading and close it afterwards.
+    Data are hashed from the current position to the end of file. On Python 3
+    data are read into one reusable buffer if file-like object supports
+    readinto(). Since Python 3.11 :py:func:`hashlib.file_digest` is used
+    instead for real files.
 
-    :param fileobj: file-like object
+    :param fileobj: binary file-like object
     :return: SHA1 digest as hexdecimal digits only
     :rtype: str
     """
+    # file_digest() hashes whole buffer of objects like io.BytesIO regardless
+    # of their position, so use it for real files only
+    if hasattr(hashlib, "file_digest") and not hasattr(fileobj, "getbuffer"):
+        # Python 3.11+ runs the whole loop in C
+        try:
+            return hashlib.file_digest(fileobj, "sha1").hexdigest()
+        except ValueError:
+            # Not a binary file object with readinto(), nothing was read yet
+            pass
     sha1 = hashlib.sha1()
+    if is_py2 or not hasattr(fileobj, "readinto"):
+        while True:
+            data = fileobj.read(BUFFER_SIZE)
+            if not data:
+                break
+            sha1.update(data)
+        return sha1.hexdigest()
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
     while True:
-        data = fileobj.read(BUFFER_SIZE)
-        if not data:
+        size = fileobj.readinto(buf)
+        if not size:
             break
-        sha1.update(data)
+        sha1.update(view[:size])
     return sha1.hexdigest()
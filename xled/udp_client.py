@@ -13,6 +13,10 @@ from xled.exceptions import ReceiveTimeout
 
 DEFAULT_BROADCAST = "255.255.255.255"
 
+#: Requested size of kernel receive buffer so bursts of replies from many
+#: devices aren't dropped before they are read
+RECEIVE_BUFFER_SIZE = 1 << 20
+
 
 class UDPClient(object):
     """
@@ -55,6 +59,7 @@ class UDPClient(object):
             )
             if self.broadcast:
                 _handle.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            _handle.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
             _handle.bind(("", 0))
             if self.receive_timeout:
                 _handle.settimeout(self.receive_timeout)
@@ -84,13 +89,10 @@ class UDPClient(object):
         :return: received message, sender address
         :rtype: tuple
         """
-        while True:
-            try:
-                buf, addrinfo = self.handle.recvfrom(bufsize)
-            except socket.timeout:
-                raise ReceiveTimeout
-                continue
-            assert len(addrinfo) == 2
-            host, port = addrinfo
-            break
+        try:
+            buf, addrinfo = self.handle.recvfrom(bufsize)
+        except socket.timeout:
+            raise ReceiveTimeout
+        assert len(addrinfo) == 2
+        host, port = addrinfo
         return buf, host
@@ -9,20 +9,58 @@ Miscellaneous utility functions.
 
 from __future__ import absolute_import
 
+import binascii
 import datetime
+import re
+import time
+
+from xled.compat import is_py2
+
+#: Matches MAC address as six pairs of hexadecimal digits separated
+#: consistently by colons or dashes or not separated at all
+MAC_ADDRESS_RE = re.compile(
+    r"^[0-9a-fA-F]{2}([:-]?)[0-9a-fA-F]{2}(?:\1[0-9a-fA-F]{2}){4}\Z"
+)
 
 
 def seconds_after_midnight():
-    now = datetime.datetime.now()
-    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    return (now - midnight).seconds
+    now = time.localtime()
+    return now.tm_hour * 60 * 60 + now.tm_min * 60 + now.tm_sec
 
 
-def date_from_seconds_after_midnight(seconds):
-    now = datetime.datetime.now()
+def date_from_seconds_after_midnight(seconds, now=None):
+    if now is None:
+        now = datetime.datetime.now()
     then = now + datetime.timedelta(seconds=seconds)
     return then
 
 
 def seconds_after_midnight_from_time(hours, minutes):
     return hours * 60 * 60 + minutes * 60
+
+
+def parse_mac_address(mac_address):
+    """
+    Converts MAC address in one of common formats to 6 bytes
+
+    Only formats matched by :py:const:`MAC_ADDRESS_RE` are recognized.
+
+    :param mac_address: MAC address as text or bytes
+    :return: packed MAC address or None if format isn't recognized
+    :rtype: bytes or None
+    """
+    if not is_py2 and isinstance(mac_address, bytes):
+        try:
+            mac_address = mac_address.decode("ascii")
+        except UnicodeDecodeError:
+            return None
+    try:
+        match = MAC_ADDRESS_RE.match(mac_address)
+    except TypeError:
+        return None
+    if match is None:
+        return None
+    separator = match.group(1)
+    if separator:
+        mac_address = mac_address.replace(separator, "")
+    return binascii.unhexlify(mac_address)